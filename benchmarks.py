@@ -0,0 +1,325 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from days1to5 import (ArrayLocationMap, BingoBoard, BingoEngine, BingoSolver, CommandLog, CompactBingoBoard, Day1,
+                      DiagnosticReport, LocationMap, MappedInput, SegmentOverlap, SegmentTable, SparseLocationMap,
+                      Submarine)
+from main import CrabCostModel, CrabFleetOptimizer, CrabOptimizer
+
+
+def _timeIt(func, *args, repeat=3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def benchmarkDay1Backends(sizes=(10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7, 10 ** 8), python_limit=10 ** 7, seed=0):
+    """
+    Compares the pure Python Day1 methods with the NumPy backend on random depth readings. The Python backend is
+    skipped above python_limit readings, where the tuple alone would need several GB.
+    """
+    rng = np.random.default_rng(seed)
+    for size in sizes:
+        depths = rng.integers(-100, 100, size, dtype=np.int64).cumsum()
+
+        numpyTime, numpyResult = _timeIt(lambda: (Day1.vectorizedIncreases(depths, 1),
+                                                  Day1.vectorizedIncreases(depths, 3)))
+        line = f"Day1 n={size:>11,}: numpy {numpyTime:9.4f}s"
+
+        if size <= python_limit:
+            day = Day1(depths.tolist())
+            pythonTime, pythonResult = _timeIt(lambda: (day.part1_IncreaseInDepth(),
+                                                        day.part2_IncreaseInDepthIn3Points()), repeat=1)
+            assert pythonResult == numpyResult
+            line += f"  python {pythonTime:9.4f}s  speedup {pythonTime / numpyTime:7.1f}x"
+
+        print(line)
+
+
+def benchmarkDay2Replay(commands=10 ** 7, worker_counts=None, seed=0):
+    """
+    Replays a synthetic navigation log with the compiled executor and with the sharded process pool for increasing
+    worker counts.
+    """
+    rng = np.random.default_rng(seed)
+    names = np.array(['forward', 'up', 'down'])
+    lines = np.char.add(np.char.add(names[rng.integers(0, 3, commands)], ' '),
+                        rng.integers(1, 10, commands).astype(str))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'commands.txt')
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines))
+
+        compiledTime, expected = _timeIt(lambda: CommandLog.fromFile(path).execute().location, repeat=1)
+        print(f"Day2 n={commands:,}: compiled {compiledTime:8.3f}s")
+
+        for workers in worker_counts or range(1, os.cpu_count() + 1):
+            parallelTime, result = _timeIt(lambda: CommandLog.replayParallel(path, workers=workers).location,
+                                           repeat=1)
+            assert result == expected
+            print(f"Day2 workers={workers:>3}: {parallelTime:8.3f}s  {commands / parallelTime:14,.0f} commands/s")
+
+
+def benchmarkDiagnosticReport(lines=10 ** 6, width=12, seed=0):
+    """
+    Compares the memory and power rate time of the packed DiagnosticReport with the tuple of strings used by Day3.
+    """
+    rng = np.random.default_rng(seed)
+    report = DiagnosticReport(rng.integers(0, 1 << width, lines, dtype=np.uint64), width)
+    data = report.lines()
+
+    tupleBytes = sys.getsizeof(data) + sum(sys.getsizeof(line) for line in data)
+    print(f"Diagnostic n={lines:,} width={width}: tuple {tupleBytes / 2 ** 20:8.1f} MB  "
+          f"packed {report.packed.nbytes / 2 ** 20:8.1f} MB")
+
+    submarine = Submarine()
+    tupleTime, tupleResult = _timeIt(lambda: (int(submarine._calculateGammaRate(data), 2),
+                                              int(submarine._calculateEpsilonRate(data), 2)), repeat=1)
+    packedTime, packedResult = _timeIt(lambda: (DiagnosticReport.fromLines(data).gammaRate(),
+                                                report.epsilonRate()), repeat=1)
+    assert tupleResult == packedResult
+    print(f"Diagnostic power rates: tuple {tupleTime:8.3f}s  packed (including packing) {packedTime:8.3f}s")
+
+
+def benchmarkDiagnosticAppend(lines=10 ** 6, width=12, batch_size=1000, seed=0):
+    """
+    Measures sustained append throughput of Submarine.add_lines, querying both products after every batch.
+    """
+    rng = np.random.default_rng(seed)
+    report = DiagnosticReport(rng.integers(0, 1 << width, lines, dtype=np.uint64), width).lines()
+    submarine = Submarine()
+
+    start = time.perf_counter()
+    for i in range(0, lines, batch_size):
+        submarine.add_lines(report[i: i + batch_size])
+        _ = submarine.powerConsumption, submarine.lifeSupportRating
+    elapsed = time.perf_counter() - start
+
+    print(f"Diagnostic append n={lines:,} batch={batch_size}: {elapsed:8.3f}s  {lines / elapsed:12,.0f} lines/s")
+
+
+def _randomBingo(boards, numbers=100, seed=0):
+    rng = np.random.default_rng(seed)
+    grids = np.argsort(rng.random((boards, numbers)), axis=1)[:, :25]
+    return grids, rng.permutation(numbers)
+
+
+def _replayFirstWinner(grids, rolls):
+    boards = [BingoBoard([' '.join(map(str, row)) for row in grid.reshape(5, 5)]) for grid in grids]
+    for roll in rolls:
+        for i, board in enumerate(boards):
+            if board.processDraw(roll):
+                return i, board._sumOfUnmarkedElements() * roll
+
+
+def benchmarkBingo(board_counts=(10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5), replay_limit=10 ** 4, seed=0):
+    """
+    Finds the first winner with the BingoBoard replay used by Day4, the BingoEngine inverted index and the
+    BingoSolver win turn reduction.
+    """
+    for boards in board_counts:
+        grids, rolls = _randomBingo(boards, seed=seed)
+
+        def engineFirstWinner():
+            engine = BingoEngine(grids)
+            for roll in rolls:
+                if len(winners := engine.draw(int(roll))):
+                    return int(winners[0]), int(engine.winScores[winners[0]])
+
+        solverTime, result = _timeIt(lambda: BingoSolver(grids).firstWinner(rolls))
+        expected = result.board, result.score
+        engineTime, engineResult = _timeIt(engineFirstWinner)
+        assert engineResult == expected
+        line = f"Bingo boards={boards:>9,}: solver {solverTime:8.4f}s  engine {engineTime:8.4f}s"
+
+        if boards <= replay_limit:
+            replayTime, replayResult = _timeIt(_replayFirstWinner, grids, rolls, repeat=1)
+            assert replayResult == expected
+            line += f"  replay {replayTime:8.4f}s"
+
+        print(line)
+
+
+def benchmarkBingoBoards(boards=10 ** 4, seed=0):
+    """
+    Compares memory per board and draw throughput of BingoBoard and CompactBingoBoard over a full game.
+    """
+    grids, rolls = _randomBingo(boards, seed=seed)
+    rows = [[' '.join(map(str, row)) for row in grid.reshape(5, 5)] for grid in grids]
+    rolls = rolls.tolist()
+
+    for boardClass in (BingoBoard, CompactBingoBoard):
+        tracemalloc.start()
+        instances = [boardClass(board) for board in rows]
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        def play():
+            return sum(board.processDraw(roll) for roll in rolls for board in instances)
+
+        elapsed, wins = _timeIt(play, repeat=1)
+        print(f"{boardClass.__name__:>17}: {memory / boards:8.0f} B/board  "
+              f"{boards * len(rolls) / elapsed:12,.0f} draws/s  ({wins} winning draws)")
+
+
+def _randomSegments(segments, extent, rng):
+    start = rng.integers(0, extent, (segments, 2))
+    direction = np.array([(1, 0), (0, 1), (1, 1), (1, -1)])[rng.integers(0, 4, segments)]
+    length = rng.integers(0, extent, segments)
+    end = start + direction * length[:, None]
+    inside = (end >= 0).all(axis=1) & (end < extent).all(axis=1)
+
+    return np.hstack((start, end))[inside].tolist()
+
+
+def benchmarkSegmentOverlap(segment_counts=(100, 1000), extents=(10 ** 3, 10 ** 4, 10 ** 5), seed=0):
+    """
+    Compares the SegmentOverlap engine with rasterizing every cell into a SparseLocationMap for random segments whose
+    length grows with the extent of the field.
+    """
+    rng = np.random.default_rng(seed)
+    for segments in segment_counts:
+        for extent in extents:
+            lines = _randomSegments(segments, extent, rng)
+
+            def rasterize():
+                locationMap = SparseLocationMap()
+                for line in lines:
+                    locationMap.markSegment(*line)
+                return locationMap.overlapCount()
+
+            analyticTime, result = _timeIt(lambda: SegmentOverlap(lines).overlapCount(), repeat=1)
+            rasterTime, expected = _timeIt(rasterize, repeat=1)
+            assert result == expected
+            print(f"Segments n={len(lines):>6,} extent={extent:>8,}: analytic {analyticTime:8.3f}s  "
+                  f"raster {rasterTime:8.3f}s  ({result:,} overlaps)")
+
+
+def benchmarkArrayLocationMap(segment_counts=(500, 10 ** 4, 10 ** 6), size=1000, python_limit=10 ** 4, seed=0):
+    """
+    Compares rasterizing with LocationMap and with ArrayLocationMap on random segments of a size x size field.
+    """
+    rng = np.random.default_rng(seed)
+    for segments in segment_counts:
+        lines = np.array(_randomSegments(segments, size, rng)).reshape(-1, 4)
+
+        def rasterizeArray():
+            locationMap = ArrayLocationMap(size)
+            locationMap.markSegments(lines)
+            return locationMap.overlapCount()
+
+        arrayTime, result = _timeIt(rasterizeArray, repeat=1)
+        line = f"LocationMap n={len(lines):>9,}: array {arrayTime:8.3f}s"
+
+        if segments <= python_limit:
+            def rasterizeLists():
+                locationMap = LocationMap(size)
+                for x1, y1, x2, y2 in lines.tolist():
+                    locationMap.markLine(LocationMap.Point(x1, y1), LocationMap.Point(x2, y2))
+                return sum(1 for row in locationMap.data for point in row if point > 1)
+
+            listTime, expected = _timeIt(rasterizeLists, repeat=1)
+            assert result == expected
+            line += f"  lists {listTime:8.3f}s  speedup {listTime / arrayTime:6.1f}x"
+
+        print(line)
+
+
+def benchmarkSegmentParsing(segments=10 ** 7, list_limit=10 ** 6, seed=0):
+    """
+    Measures parse throughput and peak traced memory of SegmentTable and of the two pass parser of Day5 on a synthetic
+    vent survey. The list parser is skipped above list_limit segments.
+    """
+    rng = np.random.default_rng(seed)
+    coordinates = rng.integers(0, 1000, (segments, 4)).astype(str)
+    lines = np.char.add(np.char.add(np.char.add(coordinates[:, 0], ','), coordinates[:, 1]), ' -> ')
+    lines = np.char.add(np.char.add(np.char.add(lines, coordinates[:, 2]), ','), coordinates[:, 3])
+
+    def parseLists():
+        with open(path, "r") as f:
+            data = [[point.strip().split(',') for point in line.strip().split(' -> ')]
+                    for line in f.read().splitlines()]
+            return [[LocationMap.Point(int(point[0]), int(point[1])) for point in line] for line in data]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'vents.txt')
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines))
+        megabytes = os.path.getsize(path) / 2 ** 20
+
+        parsers = [('SegmentTable', lambda: SegmentTable.fromFile(path))]
+        if segments <= list_limit:
+            parsers.append(('Day5 lists', parseLists))
+
+        for name, parse in parsers:
+            tracemalloc.start()
+            elapsed, _ = _timeIt(parse, repeat=1)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{name:>12} n={segments:,}: {elapsed:8.3f}s  {megabytes / elapsed:8.1f} MB/s  "
+                  f"peak {peak / 2 ** 20:8.1f} MB")
+
+
+def benchmarkCrabCostModels(ranges=(10 ** 3, 10 ** 4, 10 ** 5), crabs=1000, seed=0):
+    """
+    Compares the binary search of CrabOptimizer with its dense scan for the convex cost models.
+    """
+    rng = np.random.default_rng(seed)
+    models = {'linear': CrabCostModel.LINEAR, 'triangular': CrabCostModel.TRIANGULAR,
+              'quadratic': CrabCostModel.QUADRATIC}
+    for size in ranges:
+        optimizer = CrabOptimizer(np.bincount(rng.integers(0, size, crabs), minlength=size))
+        for name, model in models.items():
+            searchTime, result = _timeIt(optimizer.search, model)
+            scanTime, expected = _timeIt(optimizer.scan, model, repeat=1)
+            assert result == expected
+            print(f"Crabs R={size:>9,} {name:>10}: search {searchTime:8.4f}s  scan {scanTime:8.4f}s")
+
+
+def benchmarkCrabFleets(fleets=2000, crabs=1000, extent=2000, worker_counts=None, chunk_size=64, seed=0):
+    """
+    Reports fleets per second of CrabFleetOptimizer on random fleets for increasing worker counts.
+    """
+    rng = np.random.default_rng(seed)
+    positions = list(rng.integers(0, extent, (fleets, crabs)))
+    for workers in worker_counts or range(1, os.cpu_count() + 1):
+        optimizer = CrabFleetOptimizer(workers, chunk_size)
+        optimizer.optimize(positions)
+        print(f"Crab fleets n={fleets:,} workers={workers:>3}: {optimizer.elapsed:8.3f}s  "
+              f"{optimizer.fleetsPerSecond:10,.0f} fleets/s")
+
+
+def benchmarkMappedInput(lines=10 ** 7, width=12, seed=0):
+    """
+    Reports the parse throughput of MappedInput for a file of depth readings and a fixed width diagnostic report.
+    """
+    rng = np.random.default_rng(seed)
+    with tempfile.TemporaryDirectory() as directory:
+        depthPath = os.path.join(directory, 'depths.txt')
+        np.savetxt(depthPath, rng.integers(0, 10 ** 4, lines), fmt='%d')
+        reportPath = os.path.join(directory, 'report.txt')
+        bits = rng.integers(0, 2, (lines, width), dtype=np.uint8) + np.uint8(ord('0'))
+        np.hstack((bits, np.full((lines, 1), ord('\n'), dtype=np.uint8))).tofile(reportPath)
+
+        for name, path, parse in (('integers', depthPath, MappedInput.integerChunks),
+                                  ('bit matrix', reportPath, MappedInput.bitMatrixChunks)):
+            mapped = MappedInput(path)
+            for _ in parse(mapped):
+                pass
+            print(f"MappedInput {name:>10} n={lines:,}: {mapped.bytesParsed / 2 ** 20:8.1f} MB  "
+                  f"{mapped.throughput:8.1f} MB/s")
+
+
+if __name__ == '__main__':
+    benchmarkDay1Backends(sizes=(10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6))
@@ -1,5 +1,13 @@
+import bisect
+import collections
+import concurrent.futures
 import enum
+import itertools
+import os
 import pprint
+import time
+
+import numpy as np
 
 
 class Day1:
@@ -30,7 +38,11 @@ class Day1:
     the sonar sweep found depths of 199, 200, 208, 210, and so on.
     """
 
-    def __init__(self):
+    def __init__(self, data=None):
+        if data is not None:
+            self.data = tuple(data)
+            return
+
         with open("Data/Day1Data.txt", "r") as f:
             self.data = tuple(int(d) for d in f.read().splitlines())
 
@@ -109,6 +121,227 @@ class Day1:
         """
         return self.part1_IncreaseInDepth(tuple(sum(self.data[i: i + 3]) for i in range(len(self.data) - 2)))
 
+    @staticmethod
+    def streamIncreases(source=None, window_sizes=(1, 3)):
+        """
+        Counts the increases for several window sizes in one pass over the source without loading it into memory.
+        Reads Data/Day1Data.txt when no source is given.
+        :return: dict mapping each window size to its increase count
+        """
+        if source is None:
+            with open("Data/Day1Data.txt", "r") as f:
+                return SonarStream(f, window_sizes).increaseCounts()
+
+        return SonarStream(source, window_sizes).increaseCounts()
+
+    @staticmethod
+    def loadDepthArray(path="Data/Day1Data.txt"):
+        return MappedInput(path).integers()
+
+    @staticmethod
+    def windowSums(depths, window_size=3):
+        cumulative = np.concatenate(([0], np.cumsum(depths, dtype=np.int64)))
+        return cumulative[window_size:] - cumulative[:-window_size]
+
+    @staticmethod
+    def vectorizedIncreases(depths, window_size=1):
+        """
+        NumPy backend for part1_IncreaseInDepth (window_size=1) and part2_IncreaseInDepthIn3Points (window_size=3).
+        The pure Python methods are kept as the reference implementation.
+        """
+        sums = Day1.windowSums(np.asarray(depths), window_size)
+        return int(np.count_nonzero(sums[1:] > sums[:-1]))
+
+
+class SonarStream:
+    """
+    Streaming counterpart of Day1 for depth feeds that do not fit in memory.
+
+    Two consecutive sliding windows of size k share k - 1 measurements, so the later window sum is larger exactly when
+    the measurement entering the window is larger than the one leaving it. Only the last max(k) measurements have to
+    be kept to answer every window size at once.
+    """
+
+    def __init__(self, source, window_sizes=(1, 3), chunk_size=1 << 16):
+        if not window_sizes or min(window_sizes) < 1:
+            raise ValueError("Window sizes must be positive")
+
+        self.source = source
+        self.windowSizes = tuple(dict.fromkeys(window_sizes))
+        self.chunkSize = chunk_size
+
+    def readDepths(self):
+        if hasattr(self.source, 'read'):
+            return self.readChunks(self.source, self.chunkSize)
+
+        return map(int, self.source)
+
+    @staticmethod
+    def readChunks(f, chunk_size=1 << 16):
+        """
+        Reads a file handle in fixed size chunks and parses every complete integer of a chunk in bulk. A number split
+        across two chunks is carried over to the next one.
+        """
+        remainder = ''
+        while chunk := f.read(chunk_size):
+            if isinstance(chunk, bytes):
+                chunk = chunk.decode()
+            tokens = (remainder + chunk).split()
+            if not tokens:
+                remainder = ''
+                continue
+
+            remainder = '' if chunk[-1].isspace() else tokens.pop()
+            yield from map(int, tokens)
+
+        if remainder:
+            yield int(remainder)
+
+    def increaseCounts(self):
+        window = collections.deque(maxlen=max(self.windowSizes))
+        counts = dict.fromkeys(self.windowSizes, 0)
+
+        for depth in self.readDepths():
+            seen = len(window)
+            for k in self.windowSizes:
+                if seen >= k and depth > window[-k]:
+                    counts[k] += 1
+            window.append(depth)
+
+        return counts
+
+
+class MappedInput:
+    """
+    Zero-copy ingestion of a puzzle input file. The file is memory-mapped and walked in windows of about window bytes
+    that end on a newline. Each window is parsed straight from the mapped bytes, so files larger than RAM can be
+    streamed. bytesParsed and elapsed are updated as windows are parsed, and throughput reports MB/s.
+    """
+    WINDOW = 1 << 26
+    MAX_DIGITS = 18
+    POWERS_OF_TEN = 10 ** np.arange(MAX_DIGITS, dtype=np.int64)
+    WHITESPACE = b' \t\r\n'
+
+    def __init__(self, path, window=WINDOW):
+        self.path = path
+        self.window = window
+        self.bytesParsed = 0
+        self.elapsed = 0.0
+
+    @property
+    def throughput(self):
+        return self.bytesParsed / 2 ** 20 / self.elapsed if self.elapsed else 0.0
+
+    def windows(self, start=0, stop=None):
+        """
+        Yields the mapped bytes from start to stop in windows that end on a newline. start and stop should fall right
+        after a newline.
+        """
+        if not os.path.getsize(self.path):
+            return
+
+        mapped = np.memmap(self.path, dtype=np.uint8, mode='r')
+        stop = len(mapped) if stop is None else min(stop, len(mapped))
+        while start < stop:
+            end = min(start + self.window, stop)
+            if end < stop:
+                newlines = np.flatnonzero(mapped[start:end] == ord('\n'))
+                if len(newlines):
+                    end = start + int(newlines[-1]) + 1
+                else:
+                    following = np.flatnonzero(mapped[end:stop] == ord('\n'))
+                    end = end + int(following[0]) + 1 if len(following) else stop
+            yield mapped[start:end]
+            start = end
+
+    def _parsed(self, parse):
+        for window in self.windows():
+            started = time.perf_counter()
+            result = parse(window)
+            self.elapsed += time.perf_counter() - started
+            self.bytesParsed += len(window)
+            yield result
+
+    def integerChunks(self):
+        """
+        Yields the non-negative integers of every window as an int64 array.
+        """
+        return self._parsed(self.decodeIntegers)
+
+    def integers(self):
+        return np.concatenate([np.empty(0, dtype=np.int64), *self.integerChunks()])
+
+    def bitMatrixChunks(self):
+        """
+        Yields the lines of a fixed width report of 0 and 1 as (lines, width) uint8 bit matrices, reading the lines as
+        a strided view of the mapped bytes.
+        """
+        return self._parsed(self._bitMatrix)
+
+    def bitMatrix(self):
+        return np.concatenate(list(self.bitMatrixChunks()))
+
+    @staticmethod
+    def _bitMatrix(window):
+        newlines = np.flatnonzero(window == ord('\n'))
+        width = int(newlines[0]) if len(newlines) else len(window)
+        # CRLF lines are read as one column wider and the '\r' column is dropped below
+        crlf = width > 0 and window[width - 1] == ord('\r')
+        if window[-1] != ord('\n'):
+            ending = b'\r\n' if crlf and window[-1] != ord('\r') else b'\n'
+            window = np.append(window, np.frombuffer(ending, dtype=np.uint8))
+        if len(window) % (width + 1):
+            raise ValueError("Diagnostic lines must all have the same width")
+
+        rows = window.reshape(-1, width + 1)
+        if crlf:
+            if np.any(rows[:, width - 1] != ord('\r')):
+                raise ValueError("Diagnostic lines must all use the same line ending")
+            width -= 1
+
+        bits = rows[:, :width] - np.uint8(ord('0'))
+        if np.any(bits > 1):
+            raise ValueError("Diagnostic lines must only contain 0 and 1")
+
+        return bits
+
+    @staticmethod
+    def decodeIntegers(raw, separators=b''):
+        """
+        Decodes the whitespace separated integers of raw, each of at most 18 digits with an optional leading '-',
+        looping once per decimal place rather than once per number. Bytes in separators may also separate numbers;
+        any other byte raises ValueError.
+        """
+        text = np.frombuffer(raw, dtype=np.uint8) if isinstance(raw, bytes) else raw
+        digits = text - np.uint8(ord('0'))
+        isDigit = digits < 10
+        followedByDigit = np.append(isDigit[1:], False)
+        precededByDigit = np.insert(isDigit[:-1], 0, False)
+        isSign = (text == ord('-')) & followedByDigit & ~precededByDigit
+
+        allowed = isDigit | isSign
+        for separator in MappedInput.WHITESPACE + separators:
+            allowed |= text == separator
+        if not allowed.all():
+            offset = int(np.argmin(allowed))
+            raise ValueError(f"Unexpected byte {bytes(text[offset:offset + 1])!r} at offset {offset}")
+
+        edges = np.diff(isDigit.view(np.int8), prepend=np.int8(0), append=np.int8(0))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        lengths = ends - starts
+        if len(lengths) and lengths.max() > MappedInput.MAX_DIGITS:
+            raise ValueError(f"Integers of more than {MappedInput.MAX_DIGITS} digits are not supported")
+
+        values = np.zeros(len(starts), dtype=np.int64)
+        for place in range(int(lengths.max(initial=0))):
+            values += np.where(lengths > place, digits[ends - 1 - place], 0) * MappedInput.POWERS_OF_TEN[place]
+
+        negative = isSign[np.maximum(starts - 1, 0)] & (starts > 0)
+        values[negative] *= -1
+
+        return values
+
 
 class Submarine:
     class Commands(enum.Enum):
@@ -139,6 +372,7 @@ class Submarine:
         self.aim = 0
         self.gammaRate = 0
         self.epsilonRate = 0
+        self.diagnosticIndex = None
 
     def processCommand(self, command, step):
         # noinspection PyUnusedLocal
@@ -154,10 +388,55 @@ class Submarine:
                 print(f"Invalid Command {command}")
 
     def processDiagnostic(self, diagnostic_data):
-        self._calculateGammaRate(diagnostic_data)
-        self._calculateEpsilonRate(diagnostic_data)
-        self._calculateOxygenGeneratorRating(diagnostic_data)
-        self._calculateCO2ScrubberRating(diagnostic_data)
+        # The ratings filter with the gamma and epsilon helpers, so the rates of the full report are set last
+        if isinstance(diagnostic_data, DiagnosticReport):
+            self.gammaRate = diagnostic_data.gammaRate()
+            self.epsilonRate = diagnostic_data.epsilonRate()
+            if (oxygenGeneratorRating := diagnostic_data.oxygenGeneratorRating()) is not None:
+                self.oxygenGeneratorRating = oxygenGeneratorRating
+            if (co2ScrubberRating := diagnostic_data.co2ScrubberRating()) is not None:
+                self.co2ScrubberRating = co2ScrubberRating
+        else:
+            self._calculateOxygenGeneratorRating(diagnostic_data)
+            self._calculateCO2ScrubberRating(diagnostic_data)
+            self._calculateGammaRate(diagnostic_data)
+            self._calculateEpsilonRate(diagnostic_data)
+
+    def add_lines(self, lines):
+        """
+        Adds diagnostic lines to the incremental diagnostic index and refreshes the rates and ratings, so that
+        powerConsumption and lifeSupportRating can be queried at any time. Costs O(width) per line.
+        """
+        lines = list(lines)
+        index = self.diagnosticIndex
+        if index is None:
+            if not lines:
+                return
+            index = DiagnosticIndex(len(lines[0].strip()))
+
+        # The index is only changed if every line is valid, so the rates and ratings never go stale
+        index.addLines(lines)
+        self.diagnosticIndex = index
+        self._refreshDiagnostic()
+
+    def remove_lines(self, lines):
+        if self.diagnosticIndex is None:
+            raise ValueError("No diagnostic lines have been added")
+
+        self.diagnosticIndex.removeLines(lines)
+        self._refreshDiagnostic()
+
+    def _refreshDiagnostic(self):
+        index = self.diagnosticIndex
+        if index is None or not len(index):
+            self.gammaRate = self.epsilonRate = self.oxygenGeneratorRating = self.co2ScrubberRating = 0
+            return
+
+        # Like processDiagnostic on a new Submarine, a rating without a unique line is left at 0
+        self.gammaRate = index.gammaRate()
+        self.epsilonRate = index.epsilonRate()
+        self.oxygenGeneratorRating = index.oxygenGeneratorRating() or 0
+        self.co2ScrubberRating = index.co2ScrubberRating() or 0
 
     def _calculateGammaRate(self, data):
         data = tuple(map(tuple, zip(*data)))  # Transpose the 2D list
@@ -210,6 +489,187 @@ class Submarine:
             return data[0]
 
 
+class CommandLog:
+    """
+    Navigation log encoded once into an opcode array and a step array, so the whole log can be replayed with prefix
+    sums instead of one processCommand call per command. Text is encoded window by window straight from its bytes,
+    without creating a Python object per command.
+    """
+    WINDOW = 1 << 20
+    OPCODES = {command.value: opcode for opcode, command in enumerate(Submarine.Commands)}
+    FORWARD = OPCODES[Submarine.Commands.FORWARD.value]
+    UP = OPCODES[Submarine.Commands.UP.value]
+    DOWN = OPCODES[Submarine.Commands.DOWN.value]
+
+    def __init__(self, opcodes, steps):
+        self.opcodes = np.asarray(opcodes, dtype=np.uint8)
+        self.steps = steps if isinstance(steps, np.ndarray) else self._stepArray(steps)
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    @classmethod
+    def fromFile(cls, path="Data/Day2Data.txt", start=0, stop=None, window=WINDOW):
+        """
+        Encodes the commands between byte offsets start and stop of the file, one memory-mapped window at a time.
+        """
+        return cls._fromWindows(MappedInput(path, window).windows(start, stop))
+
+    @classmethod
+    def fromText(cls, text, window=WINDOW):
+        def windows():
+            start = 0
+            while start < len(text):
+                end = text.find('\n', start + window)
+                end = len(text) if end < 0 else end + 1
+                yield np.frombuffer(text[start:end].encode(), dtype=np.uint8)
+                start = end
+
+        return cls._fromWindows(windows())
+
+    @classmethod
+    def _fromWindows(cls, windows):
+        opcodes, steps = [np.empty(0, dtype=np.uint8)], [np.empty(0, dtype=np.int64)]
+        for window in windows:
+            windowOpcodes, windowSteps = cls._encode(window)
+            opcodes.append(windowOpcodes)
+            steps.append(windowSteps)
+
+        return cls(np.concatenate(opcodes), np.concatenate(steps))
+
+    @classmethod
+    def _encode(cls, text):
+        """
+        Encodes whole lines of text, a uint8 array, into (opcodes, steps). Tokens alternate between a command word,
+        recognised by its first byte and checked byte by byte, and a step decoded by MappedInput.decodeIntegers.
+        """
+        isToken = text > ord(' ')
+        edges = np.diff(isToken.view(np.int8), prepend=np.int8(0), append=np.int8(0))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        if len(starts) % 2:
+            raise Submarine.InvalidCommandException(f"Missing step for command {bytes(text[starts[-1]:]).decode()}")
+
+        wordStarts, wordEnds = starts[0::2], ends[0::2]
+        opcodes = np.full(len(wordStarts), len(cls.OPCODES), dtype=np.uint8)
+        for word, opcode in cls.OPCODES.items():
+            word = np.frombuffer(word.encode(), dtype=np.uint8)
+            matches = (text[wordStarts] == word[0]) & (wordEnds - wordStarts == len(word))
+            for i in range(1, len(word)):
+                matches &= text[np.minimum(wordStarts + i, len(text) - 1)] == word[i]
+            opcodes[matches] = opcode
+
+        invalid = np.flatnonzero(opcodes == len(cls.OPCODES))
+        if len(invalid):
+            i = int(invalid[0])
+            raise Submarine.InvalidCommandException(
+                f"Invalid Command {bytes(text[wordStarts[i]:wordEnds[i]]).decode()!r}")
+
+        # Blank the command words, one byte offset at a time, so that only the steps are left for the integer decoder
+        text = np.array(text)
+        lengths = wordEnds - wordStarts
+        for i in range(int(lengths.max(initial=0))):
+            text[wordStarts[lengths > i] + i] = ord(' ')
+
+        return opcodes, MappedInput.decodeIntegers(text)
+
+    @classmethod
+    def fromCommands(cls, commands):
+        opcodes, steps = [], []
+        for command, step in commands:
+            opcodes.append(cls.OPCODES[command.value])
+            steps.append(step)
+
+        return cls(opcodes, steps)
+
+    @staticmethod
+    def _stepArray(steps):
+        try:
+            return np.array(steps, dtype=np.int64)
+        except OverflowError:
+            return np.array(steps, dtype=object)
+
+    def summary(self):
+        """
+        Reduces the log to (position delta, aim delta, depth delta at zero incoming aim). Starting from an aim a, the
+        log moves the depth by depthDelta + a * positionDelta.
+        """
+        isForward = self.opcodes == self.FORWARD
+        aimSteps = np.where(self.opcodes == self.DOWN, self.steps, 0) - np.where(self.opcodes == self.UP, self.steps, 0)
+        forwardSteps = np.where(isForward, self.steps, 0)
+
+        steps = self.steps
+        if steps.dtype != object and len(steps):
+            # Every partial sum is at most len(steps) times the largest step, and the depth at most its square
+            bound = max(abs(int(steps.max())), abs(int(steps.min()))) * len(steps)
+            if max(bound, bound * bound) >= np.iinfo(np.int64).max:
+                steps = steps.astype(object)
+                aimSteps = aimSteps.astype(object)
+                forwardSteps = forwardSteps.astype(object)
+
+        aim = np.cumsum(aimSteps, dtype=steps.dtype)
+        position = int(forwardSteps.sum(dtype=steps.dtype))
+        depth = int((aim * forwardSteps).sum(dtype=steps.dtype))
+        aimDelta = int(aim[-1]) if len(aim) else 0
+
+        return position, aimDelta, depth
+
+    def execute(self, submarine=None):
+        """
+        Applies the whole log to submarine (a new one by default) and returns it. The final state is identical to
+        calling processCommand for every command in order.
+        """
+        if submarine is None:
+            submarine = Submarine()
+
+        position, aim, depth = self.summary()
+        submarine.depth += depth + submarine.aim * position
+        submarine.position += position
+        submarine.aim += aim
+
+        return submarine
+
+    @staticmethod
+    def shardOffsets(path, shards):
+        """
+        Splits the file into at most shards byte ranges whose boundaries fall right after a newline.
+        """
+        size = os.path.getsize(path)
+        offsets = [0]
+        with open(path, "rb") as f:
+            for i in range(1, shards):
+                f.seek(max(size * i // shards, offsets[-1]))
+                f.readline()
+                offsets.append(min(f.tell(), size))
+        offsets.append(size)
+
+        return [(start, end) for start, end in zip(offsets, offsets[1:]) if start < end]
+
+    @classmethod
+    def replayParallel(cls, path="Data/Day2Data.txt", submarine=None, workers=None, shards=None):
+        """
+        Reduces byte-range shards of the log to summaries in a process pool and folds the summaries in file order. The
+        final state is identical to a sequential processCommand replay.
+        """
+        if submarine is None:
+            submarine = Submarine()
+        workers = workers or os.cpu_count()
+        ranges = cls.shardOffsets(path, shards or workers * 4)
+
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            summaries = pool.map(_reduceCommandShard, [path] * len(ranges), *zip(*ranges))
+            for position, aim, depth in summaries:
+                submarine.depth += depth + submarine.aim * position
+                submarine.position += position
+                submarine.aim += aim
+
+        return submarine
+
+
+def _reduceCommandShard(path, start, end):
+    return CommandLog.fromFile(path, start, end).summary()
+
+
 class Day2:
     """
     --- Day 2: Dive! ---
@@ -281,6 +741,241 @@ class Day2:
 
         return self.submarine.location
 
+    @staticmethod
+    def part1_Compiled(path="Data/Day2Data.txt"):
+        return CommandLog.fromFile(path).execute().location
+
+    @staticmethod
+    def part1_Parallel(path="Data/Day2Data.txt", workers=None):
+        return CommandLog.replayParallel(path, workers=workers).location
+
+
+class DiagnosticReport:
+    """
+    Diagnostic report with every line packed into one uint64, most significant bit first, for widths up to 64 bits.
+    The number of ones in every column is counted once on construction and shared by the gamma and epsilon rates.
+    """
+    MAX_WIDTH = 64
+
+    def __init__(self, packed, width, column_counts=None):
+        if not 0 < width <= self.MAX_WIDTH:
+            raise ValueError(f"Width must be between 1 and {self.MAX_WIDTH}, got {width}")
+
+        self.packed = np.asarray(packed, dtype=np.uint64)
+        self.width = width
+        self._sorted = None
+        if column_counts is None:
+            shifts = np.arange(width - 1, -1, -1, dtype=np.uint64)
+            column_counts = [np.count_nonzero((self.packed >> shift) & np.uint64(1)) for shift in shifts]
+        self.columnCounts = np.asarray(column_counts, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.packed)
+
+    @classmethod
+    def fromLines(cls, lines, chunk_size=1 << 16):
+        lines = iter(lines)
+        packedChunks = []
+        width = None
+        columnCounts = 0
+
+        while chunk := [line.strip() for _, line in zip(range(chunk_size), lines)]:
+            if width is None:
+                width = len(chunk[0])
+            bits = cls._bitMatrix(''.join(chunk).encode(), width)
+            if len(bits) != len(chunk):
+                raise ValueError("All diagnostic lines must have the same width")
+            columnCounts = columnCounts + bits.sum(axis=0, dtype=np.int64)
+            packedChunks.append(cls._packRows(bits))
+
+        if width is None:
+            raise ValueError("Diagnostic report is empty")
+
+        return cls(np.concatenate(packedChunks), width, columnCounts)
+
+    @classmethod
+    def fromFile(cls, path="Data/Day3Data.txt", chunk_size=1 << 16):
+        with open(path, "r") as f:
+            return cls.fromLines(f, chunk_size)
+
+    @classmethod
+    def fromMappedFile(cls, path="Data/Day3Data.txt", window=MappedInput.WINDOW):
+        packedChunks = []
+        columnCounts = 0
+        width = None
+        for bits in MappedInput(path, window).bitMatrixChunks():
+            if width is not None and bits.shape[1] != width:
+                raise ValueError("All diagnostic lines must have the same width")
+            width = bits.shape[1]
+            columnCounts = columnCounts + bits.sum(axis=0, dtype=np.int64)
+            packedChunks.append(cls._packRows(bits))
+
+        if width is None:
+            raise ValueError("Diagnostic report is empty")
+
+        return cls(np.concatenate(packedChunks), width, columnCounts)
+
+    @staticmethod
+    def _bitMatrix(raw, width):
+        bits = np.frombuffer(raw, dtype=np.uint8) - ord('0')
+        if len(bits) % width or np.any(bits > 1):
+            raise ValueError("Diagnostic lines must be fixed width strings of 0 and 1")
+
+        return bits.reshape(-1, width)
+
+    @classmethod
+    def _packRows(cls, bits):
+        padded = np.zeros((len(bits), cls.MAX_WIDTH), dtype=np.uint8)
+        padded[:, cls.MAX_WIDTH - bits.shape[1]:] = bits
+        return np.packbits(padded, axis=1).view('>u8').ravel().astype(np.uint64)
+
+    def lines(self):
+        return tuple(format(int(line), f'0{self.width}b') for line in self.packed)
+
+    def gammaRate(self):
+        rate = 0
+        for count in self.columnCounts:
+            rate = (rate << 1) | (2 * int(count) >= len(self))
+
+        return rate
+
+    def epsilonRate(self):
+        return ~self.gammaRate() & ((1 << self.width) - 1)
+
+    @property
+    def sortedPacked(self):
+        """
+        Sorted copy of the packed lines shared by both ratings. All lines with a common prefix form a contiguous range,
+        and within it the lines with the next bit set start at a position found by binary search.
+        """
+        if self._sorted is None:
+            self._sorted = np.sort(self.packed)
+
+        return self._sorted
+
+    def oxygenGeneratorRating(self):
+        return self._rating(keep_most_common=True)
+
+    def co2ScrubberRating(self):
+        return self._rating(keep_most_common=False)
+
+    def _rating(self, keep_most_common):
+        """
+        Narrows the range of candidate lines one bit at a time with the tie-breaking of
+        Submarine._calculateOxygenGeneratorRating and Submarine._calculateCO2ScrubberRating: ones win a tie for the
+        oxygen generator rating and zeros win a tie for the CO2 scrubber rating. Returns None when no line or several
+        identical lines are left after the last bit.
+        """
+        values = self.sortedPacked
+        start, end = 0, len(values)
+        prefix = 0
+
+        for shift in range(self.width - 1, -1, -1):
+            if end - start == 1:
+                break
+
+            withBit = prefix | (1 << shift)
+            split = start + int(np.searchsorted(values[start:end], np.uint64(withBit)))
+            if (end - split >= split - start) == keep_most_common:
+                start, prefix = split, withBit
+            else:
+                end = split
+
+        return int(values[start]) if end - start == 1 else None
+
+
+class DiagnosticIndex:
+    """
+    Binary trie over a growing diagnostic report, stored as one prefix -> count table per bit position. Adding or
+    removing a line updates one entry per level and one column count per bit, and every rate or rating is a walk down
+    the trie in O(width).
+    """
+
+    def __init__(self, width):
+        if width < 1:
+            raise ValueError("Width must be positive")
+
+        self.width = width
+        self.columnCounts = [0] * width
+        self.prefixCounts = [collections.Counter() for _ in range(width + 1)]
+
+    def __len__(self):
+        return self.prefixCounts[0][0]
+
+    def _parse(self, line):
+        line = line.strip()
+        if len(line) != self.width or not set(line) <= {'0', '1'}:
+            raise ValueError(f"Expected a line of {self.width} binary digits, got {line!r}")
+
+        return int(line, 2)
+
+    def _update(self, value, delta):
+        for level, counts in enumerate(self.prefixCounts):
+            prefix = value >> (self.width - level)
+            counts[prefix] += delta
+            if not counts[prefix]:
+                del counts[prefix]
+        for i in range(self.width):
+            self.columnCounts[i] += delta * (value >> (self.width - 1 - i) & 1)
+
+    def add(self, line):
+        self.addLines((line,))
+
+    def remove(self, line):
+        self.removeLines((line,))
+
+    def addLines(self, lines):
+        """
+        Adds every line, or none of them if any line is malformed.
+        """
+        values = [self._parse(line) for line in lines]
+        for value in values:
+            self._update(value, 1)
+
+    def removeLines(self, lines):
+        """
+        Removes every line, or none of them if any line is malformed or occurs more often than in the report.
+        """
+        values = collections.Counter(self._parse(line) for line in lines)
+        for value, count in values.items():
+            if self.prefixCounts[self.width][value] < count:
+                raise ValueError(f"Line {value:0{self.width}b} is not in the diagnostic report")
+
+        for value, count in values.items():
+            self._update(value, -count)
+
+    def gammaRate(self):
+        rate = 0
+        for count in self.columnCounts:
+            rate = (rate << 1) | (2 * count >= len(self))
+
+        return rate
+
+    def epsilonRate(self):
+        return ~self.gammaRate() & ((1 << self.width) - 1)
+
+    def oxygenGeneratorRating(self):
+        return self._rating(keep_most_common=True)
+
+    def co2ScrubberRating(self):
+        return self._rating(keep_most_common=False)
+
+    def _rating(self, keep_most_common):
+        """
+        Same filtering and tie-breaking as DiagnosticReport._rating, following the subtree counts of the trie.
+        """
+        prefix = 0
+        for level in range(1, self.width + 1):
+            counts = self.prefixCounts[level]
+            zeros, ones = counts[prefix << 1], counts[prefix << 1 | 1]
+            if zeros + ones == 1:
+                keepOnes = ones == 1
+            else:
+                keepOnes = (ones >= zeros) == keep_most_common
+            prefix = prefix << 1 | keepOnes
+
+        return prefix if self.prefixCounts[self.width][prefix] == 1 else None
+
 
 class Day3:
     """
@@ -410,8 +1105,12 @@ class BingoBoard:
                 return True
         return False
 
+    @property
+    def score(self):
+        return self._sumOfUnmarkedElements() * self.lastNumber
+
     def calculateScore(self):
-        score = self._sumOfUnmarkedElements() * self.lastNumber
+        score = self.score
         self.printBoard()
         return score
 
@@ -424,6 +1123,218 @@ class BingoBoard:
         return unMarkedSum
 
 
+class CompactBingoBoard:
+    """
+    Drop-in replacement for BingoBoard that keeps the marked cells as a bitmask checked against precomputed row and
+    column masks and keeps a running sum of the unmarked numbers. Drawing builds no row or column tuples, and the
+    board is only printed by calculateScore when debug is set.
+    """
+    __slots__ = ('size', 'board', 'winMasks', 'marked', 'unmarkedSum', 'lastNumber', 'debug')
+    _winMasks = {}
+
+    def __init__(self, board: list[str], size=5, debug=False):
+        self.size = size
+        self.board = tuple(int(c) for r in board for c in r.split())
+        if len(self.board) != size * size:
+            raise ValueError(f"Expected {size * size} numbers, got {len(self.board)}")
+
+        self.winMasks = self.winMasksFor(size)
+        self.marked = 0
+        self.unmarkedSum = sum(self.board)
+        self.lastNumber = -1
+        self.debug = debug
+
+    @classmethod
+    def winMasksFor(cls, size):
+        if size not in cls._winMasks:
+            row = (1 << size) - 1
+            column = sum(1 << (i * size) for i in range(size))
+            cls._winMasks[size] = (tuple(row << (i * size) for i in range(size)) +
+                                   tuple(column << i for i in range(size)))
+
+        return cls._winMasks[size]
+
+    def printBoard(self):
+        pprint.pprint([list(self.board[i: i + self.size]) for i in range(0, len(self.board), self.size)])
+        pprint.pprint([[bool(self.marked >> (r * self.size + c) & 1) for c in range(self.size)]
+                       for r in range(self.size)])
+
+    def checkBingo(self):
+        marked = self.marked
+        for mask in self.winMasks:
+            if marked & mask == mask:
+                return True
+
+        return False
+
+    def processDraw(self, number_drawn):
+        if number_drawn not in self.board:
+            return False
+
+        bit = 1 << self.board.index(number_drawn)
+        if not self.marked & bit:
+            self.marked |= bit
+            self.unmarkedSum -= number_drawn
+        if self.checkBingo():
+            self.lastNumber = number_drawn
+            return True
+        return False
+
+    @property
+    def score(self):
+        return self.unmarkedSum * self.lastNumber
+
+    def calculateScore(self):
+        if self.debug:
+            self.printBoard()
+        return self.score
+
+
+BingoResult = collections.namedtuple('BingoResult', ['board', 'draw', 'score', 'turn'])
+
+
+class BingoEngine:
+    """
+    Plays every board at once through an inverted index from each number to the cells holding it. A draw only touches
+    the cells of the drawn number and bumps the hit counter of their row and column, so a board wins as soon as one of
+    those counters reaches the grid size.
+    """
+
+    def __init__(self, boards, size=5):
+        self.size = size
+        self.cells = size * size
+        self.values = np.array([board.board if isinstance(board, BingoBoard) else board for board in boards],
+                               dtype=np.int64).reshape(-1)
+        if len(self.values) % self.cells:
+            raise ValueError(f"Every board must have {self.cells} numbers")
+        self.boardCount = len(self.values) // self.cells
+
+        self.order = np.argsort(self.values, kind='stable')
+        numbers, starts = np.unique(self.values[self.order], return_index=True)
+        ends = np.append(starts[1:], len(self.values))
+        self.index = {int(n): (int(start), int(end)) for n, start, end in zip(numbers, starts, ends)}
+
+        self.marked = np.zeros(len(self.values), dtype=bool)
+        self.rowHits = np.zeros(self.boardCount * size, dtype=np.int32)
+        self.columnHits = np.zeros(self.boardCount * size, dtype=np.int32)
+        self.unmarkedSums = self.values.reshape(self.boardCount, self.cells).sum(axis=1)
+        self.won = np.zeros(self.boardCount, dtype=bool)
+        self.winScores = np.zeros(self.boardCount, dtype=np.int64)
+        self.winnerCount = 0
+
+    def draw(self, number):
+        """
+        Marks number on every board and returns the indices of the boards that won for the first time, in board order.
+        """
+        if number not in self.index:
+            return np.empty(0, dtype=np.int64)
+
+        start, end = self.index[number]
+        cells = self.order[start:end]
+        cells = cells[~self.marked[cells]]
+        self.marked[cells] = True
+
+        boards, position = np.divmod(cells, self.cells)
+        rows = boards * self.size + position // self.size
+        columns = boards * self.size + position % self.size
+        np.add.at(self.rowHits, rows, 1)
+        np.add.at(self.columnHits, columns, 1)
+        np.subtract.at(self.unmarkedSums, boards, self.values[cells])
+
+        complete = (self.rowHits[rows] == self.size) | (self.columnHits[columns] == self.size)
+        winners = np.unique(boards[complete])
+        winners = winners[~self.won[winners]]
+
+        self.won[winners] = True
+        self.winScores[winners] = self.unmarkedSums[winners] * number
+        self.winnerCount += len(winners)
+
+        return winners
+
+
+class BingoSolver:
+    """
+    Finds the winning turn of every board without replaying the draws. Each cell is replaced by the turn its number is
+    drawn; a line is complete at the latest turn of its cells and a board wins at the earliest of its complete lines.
+    Boards that never win get a win turn of len(rolls).
+    """
+
+    def __init__(self, boards, size=5):
+        self.size = size
+        self.grids = np.array([board.board if isinstance(board, BingoBoard) else board for board in boards],
+                              dtype=np.int64).reshape(-1, size, size)
+
+    def solve(self, rolls):
+        """
+        :return: (win turns, scores) for every board
+        """
+        rolls = np.asarray(rolls, dtype=np.int64)
+        turns = np.full(self.grids.shape, len(rolls), dtype=np.int64)
+        if len(rolls):
+            numbers, firstTurn = np.unique(rolls, return_index=True)
+            position = np.searchsorted(numbers, self.grids).clip(max=len(numbers) - 1)
+            drawn = numbers[position] == self.grids
+            turns[drawn] = firstTurn[position[drawn]]
+
+        winTurns = np.minimum(turns.max(axis=2).min(axis=1), turns.max(axis=1).min(axis=1))
+        unmarked = np.where(turns > winTurns[:, None, None], self.grids, 0).sum(axis=(1, 2))
+        scores = unmarked * np.append(rolls, 0)[winTurns]
+
+        return winTurns, scores
+
+    def ranking(self, rolls):
+        """
+        :return: (board indices, win turns, scores) of the boards that win, in the order they win
+        """
+        winTurns, scores = self.solve(rolls)
+        order = np.argsort(winTurns, kind='stable')
+        order = order[winTurns[order] < len(rolls)]
+
+        return order, winTurns[order], scores[order]
+
+    def firstWinner(self, rolls):
+        winTurns, scores = self.solve(rolls)
+        return self._result(rolls, winTurns, scores, int(np.argmin(winTurns)))
+
+    def lastWinner(self, rolls):
+        """
+        The board whose win completes the set, as in Day4.part2: among the boards winning on the last turn the one
+        with the highest index. None when some board never wins.
+        """
+        winTurns, scores = self.solve(rolls)
+        return self._result(rolls, winTurns, scores, len(winTurns) - 1 - int(np.argmax(winTurns[::-1])))
+
+    @staticmethod
+    def _result(rolls, win_turns, scores, board):
+        turn = int(win_turns[board])
+        if turn == len(rolls):
+            return None
+
+        return BingoResult(board, int(rolls[turn]), int(scores[board]), turn)
+
+    def simulate(self, draw_sequences, workers=None, chunk_size=16):
+        """
+        Evaluates many draw sequences against these boards in a process pool. Every worker receives the parsed boards
+        once through the pool initializer instead of once per sequence.
+        :return: list of (first winner, last winner) BingoResults, one per draw sequence
+        """
+        with concurrent.futures.ProcessPoolExecutor(workers, initializer=_initBingoWorker,
+                                                    initargs=(self.grids, self.size)) as pool:
+            return list(pool.map(_simulateBingo, draw_sequences, chunksize=chunk_size))
+
+
+_bingoWorkerSolver = None
+
+
+def _initBingoWorker(grids, size):
+    global _bingoWorkerSolver
+    _bingoWorkerSolver = BingoSolver(grids, size)
+
+
+def _simulateBingo(rolls):
+    return _bingoWorkerSolver.firstWinner(rolls), _bingoWorkerSolver.lastWinner(rolls)
+
+
 class Day4:
     """
     --- Day 4: Giant Squid --- You're already almost 1.5km (almost a mile) below the surface of the ocean,
@@ -514,25 +1425,45 @@ class Day4:
             self.boards = [BingoBoard(board.split('\n')) for board in self.data[1:]]
 
     def part1(self):
-        for roll in self.rolls:
+        for turn, roll in enumerate(self.rolls):
             for i, board in enumerate(self.boards):
                 if board.processDraw(roll):
-                    print(board.calculateScore(), roll)
-                    exit(0)
+                    return BingoResult(i, roll, board.score, turn)
 
     def part2(self):
         boardWon = [False] * len(self.boards)
-        for roll in self.rolls:
+        for turn, roll in enumerate(self.rolls):
             for i, board in enumerate(self.boards):
                 if board.processDraw(roll):
                     boardWon[i] = True
                     if all(boardWon):
-                        print(board.calculateScore(), roll)
-                        exit(0)
+                        return BingoResult(i, roll, board.score, turn)
+
+    def simulate(self, draw_sequences, workers=None):
+        """
+        Plays every draw sequence against the boards of this puzzle input without exiting.
+        :return: list of (first winner, last winner) BingoResults, one per draw sequence
+        """
+        return BingoSolver(self.boards).simulate(draw_sequences, workers)
+
+    def part1_Indexed(self):
+        engine = BingoEngine(self.boards)
+        for turn, roll in enumerate(self.rolls):
+            if len(winners := engine.draw(roll)):
+                return BingoResult(int(winners[0]), roll, int(engine.winScores[winners[0]]), turn)
+
+    def part2_Indexed(self):
+        engine = BingoEngine(self.boards)
+        for turn, roll in enumerate(self.rolls):
+            winners = engine.draw(roll)
+            if engine.winnerCount == engine.boardCount:
+                return BingoResult(int(winners[-1]), roll, int(engine.winScores[winners[-1]]), turn)
 
 
 class LocationMap:
     class Point:
+        __slots__ = ('x', 'y')
+
         def __init__(self, x, y):
             self.x = x
             self.y = y
@@ -595,6 +1526,366 @@ class LocationMap:
                 for x, y in zip(range(start.x, end.x + 1), range(start.y, end.y + movementY, movementY))]
 
 
+class SegmentTable:
+    """
+    All vent lines of a survey in one contiguous (n, 4) int32 array of x1, y1, x2, y2. The file is read in chunks that
+    end on a newline and the digits of every chunk are decoded in a single vectorized pass.
+    """
+
+    def __init__(self, segments):
+        self.data = np.ascontiguousarray(segments, dtype=np.int32).reshape(-1, 4)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, i):
+        x1, y1, x2, y2 = self.data[i].tolist()
+        return LocationMap.Point(x1, y1), LocationMap.Point(x2, y2)
+
+    @classmethod
+    def fromFile(cls, path="Data/Day5Data.txt", chunk_size=1 << 22):
+        chunks = []
+        remainder = b''
+        with open(path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                chunk = remainder + chunk
+                cut = chunk.rfind(b'\n') + 1
+                remainder = chunk[cut:]
+                chunks.append(cls._decodeSegments(chunk[:cut]))
+        chunks.append(cls._decodeSegments(remainder))
+
+        return cls(np.concatenate(chunks))
+
+    @classmethod
+    def _decodeSegments(cls, raw):
+        # Blank out the arrows so that a '-' left in the text can only be a sign, which coordinates may not have
+        text = np.frombuffer(raw, dtype=np.uint8).copy()
+        arrows = np.flatnonzero((text[:-1] == ord('-')) & (text[1:] == ord('>')))
+        text[arrows] = text[arrows + 1] = ord(' ')
+
+        values = MappedInput.decodeIntegers(text, separators=b',')
+        if len(values) % 4:
+            raise ValueError("Every vent line must have the form x1,y1 -> x2,y2")
+        if len(values) and (values.min() < 0 or values.max() > np.iinfo(np.int32).max):
+            raise ValueError("Vent coordinates must be non-negative 32 bit integers")
+
+        return values.astype(np.int32).reshape(-1, 4)
+
+
+class ArrayLocationMap:
+    """
+    LocationMap backed by a 2D ndarray of a compact unsigned dtype. Segments are rasterized in batches: all their
+    cells are generated as flat indices at once and counted with np.bincount, and counts saturate at the dtype maximum.
+    """
+
+    def __init__(self, size, dtype=np.uint8, batch_points=1 << 24):
+        self.size = size
+        self.data = np.zeros((size, size), dtype=dtype)
+        self.batchPoints = batch_points
+
+    def __repr__(self):
+        return '\n'.join(''.join('.' if point == 0 else str(point) for point in d) for d in self.data.tolist())
+
+    def markPoint(self, point: LocationMap.Point):
+        self.markSegments([(point.x, point.y, point.x, point.y)])
+
+    def markLine(self, start: LocationMap.Point, end: LocationMap.Point):
+        self.markSegments([(start.x, start.y, end.x, end.y)])
+
+    def markSegments(self, segments):
+        """
+        Marks every horizontal, vertical and 45 degree segment of an (n, 4) array of x1, y1, x2, y2. Other segments
+        are skipped, as in LocationMap.pointsInLine.
+        """
+        segments = np.asarray(segments, dtype=np.int64).reshape(-1, 4)
+        if not len(segments):
+            return
+        if segments.min() < 0 or segments.max() >= self.size:
+            raise Exception("Point out of Map")
+
+        delta = segments[:, 2:] - segments[:, :2]
+        straight = (delta[:, 0] == 0) | (delta[:, 1] == 0) | (np.abs(delta[:, 0]) == np.abs(delta[:, 1]))
+        segments, delta = segments[straight], delta[straight]
+        lengths = np.abs(delta).max(axis=1) + 1
+        ends = np.cumsum(lengths)
+
+        first = 0
+        while first < len(segments):
+            last = max(int(np.searchsorted(ends, ends[first] - lengths[first] + self.batchPoints, 'right')),
+                       first + 1)
+            self._markBatch(segments[first:last, :2], np.sign(delta[first:last]), lengths[first:last])
+            first = last
+
+    def _markBatch(self, starts, directions, lengths):
+        # Cell i of the batch lies at flatStart + step * (i - first cell of its segment) in the flattened grid
+        flatStarts = starts[:, 1] * self.size + starts[:, 0]
+        steps = directions[:, 1] * self.size + directions[:, 0]
+        origins = flatStarts - steps * (np.cumsum(lengths) - lengths)
+        cells = np.repeat(origins, lengths) + np.repeat(steps, lengths) * np.arange(lengths.sum())
+
+        flat = self.data.reshape(-1)
+        if len(cells) < len(flat) // 8:
+            touched, counts = np.unique(cells, return_counts=True)
+        else:
+            counts = np.bincount(cells, minlength=len(flat))
+            touched = np.flatnonzero(counts)
+            counts = counts[touched]
+
+        flat[touched] = np.minimum(flat[touched].astype(np.int64) + counts, np.iinfo(self.data.dtype).max)
+
+    def overlapCount(self, threshold=2):
+        return int(np.count_nonzero(self.data >= threshold))
+
+
+class TiledLocationMap:
+    """
+    LocationMap for fields too large for one grid. The plane is split into tile_size x tile_size tiles, every segment
+    is clipped to the tiles it crosses, and each tile is rasterized into its own ArrayLocationMap in a process pool.
+    A worker feeds its pieces to the grid in slices and rasterizes at most tile_size^2 cells per batch, so its peak
+    memory is the tile_size^2 byte grid plus a few int64 scratch arrays of tile_size^2 entries, however many pieces the
+    tile holds. With a spill_directory, the clipped segments are buffered only
+    up to SPILL_BUFFER pieces and then appended to one raw int32 file per tile, which the workers memory-map instead of
+    receiving the pieces through the pool, so the parent holds a bounded buffer rather than every piece.
+    """
+    SPILL_BUFFER = 1 << 16
+
+    def __init__(self, tile_size=4096, workers=None, spill_directory=None):
+        self.tileSize = tile_size
+        self.workers = workers
+        self.spillDirectory = spill_directory
+        self.spillPaths = {}
+        self.tiles = collections.defaultdict(list)
+        self.buffered = 0
+
+    def markLine(self, start: LocationMap.Point, end: LocationMap.Point):
+        self.markSegments([(start.x, start.y, end.x, end.y)])
+
+    def markSegments(self, segments):
+        for x1, y1, x2, y2 in np.asarray(segments, dtype=np.int64).reshape(-1, 4).tolist():
+            dx, dy = x2 - x1, y2 - y1
+            if dx and dy and abs(dx) != abs(dy):
+                continue
+            for tile, piece in self.clip(x1, y1, x2, y2, self.tileSize):
+                self.tiles[tile].append(piece)
+                self.buffered += 1
+            if self.spillDirectory is not None and self.buffered >= self.SPILL_BUFFER:
+                self.spill()
+
+    def spill(self):
+        """
+        Appends the buffered pieces of every tile to its spill file and empties the buffer.
+        """
+        for (tileX, tileY), tilePieces in self.tiles.items():
+            path = self.spillPaths.get((tileX, tileY))
+            # A tile's file is truncated on its first write, so a file left over from another map is never appended to
+            mode = 'ab' if path is not None else 'wb'
+            if path is None:
+                path = self.spillPaths[tileX, tileY] = os.path.join(self.spillDirectory, f"tile{tileX}_{tileY}.bin")
+            with open(path, mode) as f:
+                f.write(np.array(tilePieces, dtype=np.int32).tobytes())
+
+        self.tiles.clear()
+        self.buffered = 0
+
+    @staticmethod
+    def clip(x1, y1, x2, y2, tile_size):
+        """
+        Splits a horizontal, vertical or 45 degree segment into ((tile x, tile y), (x1, y1, x2, y2)) pieces, one per
+        tile it crosses, with the coordinates of each piece relative to the corner of its tile.
+        """
+        stepX, stepY = (x2 > x1) - (x2 < x1), (y2 > y1) - (y2 < y1)
+        length = max(abs(x2 - x1), abs(y2 - y1))
+        t = 0
+        while t <= length:
+            x, y = x1 + stepX * t, y1 + stepY * t
+            tileX, tileY = x // tile_size, y // tile_size
+            localX, localY = x - tileX * tile_size, y - tileY * tile_size
+
+            remaining = length - t
+            if stepX:
+                remaining = min(remaining, tile_size - 1 - localX if stepX > 0 else localX)
+            if stepY:
+                remaining = min(remaining, tile_size - 1 - localY if stepY > 0 else localY)
+
+            yield (tileX, tileY), (localX, localY, localX + stepX * remaining, localY + stepY * remaining)
+            t += remaining + 1
+
+    def overlapCount(self, threshold=2):
+        if self.spillDirectory is not None:
+            self.spill()
+            pieces = list(self.spillPaths.values())
+        else:
+            pieces = [np.array(tilePieces, dtype=np.int32) for tilePieces in self.tiles.values()]
+
+        with concurrent.futures.ProcessPoolExecutor(self.workers) as pool:
+            return sum(pool.map(_countTileOverlaps, [self.tileSize] * len(pieces), pieces, [threshold] * len(pieces)))
+
+
+def _countTileOverlaps(tile_size, pieces, threshold):
+    if isinstance(pieces, str):
+        pieces = np.memmap(pieces, dtype=np.int32, mode='r').reshape(-1, 4)
+
+    # A piece lies within one tile, so a slice of tile_size^2 / 4 pieces costs no more than one batch of cells
+    locationMap = ArrayLocationMap(tile_size, batch_points=tile_size ** 2)
+    rows = max(1, tile_size ** 2 // 4)
+    for start in range(0, len(pieces), rows):
+        locationMap.markSegments(pieces[start: start + rows])
+
+    return locationMap.overlapCount(threshold)
+
+
+class SparseLocationMap:
+    """
+    LocationMap for coordinates far beyond what a dense grid can hold. Cells are counted in a hash map keyed by
+    y << 32 | x, so memory grows with the number of covered cells only. Every supported line is an arithmetic range of
+    keys and is counted in one Counter.update call, without creating a Point per cell.
+    """
+    SHIFT = 32
+    LIMIT = 1 << SHIFT
+
+    def __init__(self):
+        self.data = collections.Counter()
+
+    def __len__(self):
+        return len(self.data)
+
+    @classmethod
+    def key(cls, x, y):
+        if not (0 <= x < cls.LIMIT and 0 <= y < cls.LIMIT):
+            raise Exception("Point out of Map")
+
+        return y << cls.SHIFT | x
+
+    def markPoint(self, point: LocationMap.Point):
+        self.data[self.key(point.x, point.y)] += 1
+
+    def markLine(self, start: LocationMap.Point, end: LocationMap.Point):
+        self.markSegment(start.x, start.y, end.x, end.y)
+
+    def markSegment(self, x1, y1, x2, y2):
+        dx, dy = x2 - x1, y2 - y1
+        if dx and dy and abs(dx) != abs(dy):
+            return
+
+        first, last = self.key(x1, y1), self.key(x2, y2)
+        if first == last:
+            self.data[first] += 1
+            return
+
+        length = max(abs(dx), abs(dy))
+        step = (last - first) // length
+        self.data.update(range(first, last + step, step))
+
+    def overlapCount(self, threshold=2):
+        return sum(1 for count in self.data.values() if count >= threshold)
+
+
+class SegmentOverlap:
+    """
+    Counts the points covered by at least two vent lines without visiting the cells of each line.
+
+    Every line belongs to one of four families of parallel lines and is an interval of a parameter on one line of its
+    family. Merging the intervals of each line gives the stretches it covers and the stretches covered at least twice.
+    Lines of two different families meet in at most one point, found by walking the sorted line keys of one family
+    that fall in the key range swept by an interval of the other. The result is the length of all multiply covered
+    stretches plus the crossing points, minus the crossing points already counted in those stretches.
+    """
+    # (key, param, point) of every family: horizontal, vertical, diagonal with x - y constant and with x + y constant
+    FAMILIES = (
+        (lambda x, y: y, lambda x, y: x, lambda key, param: (param, key)),
+        (lambda x, y: x, lambda x, y: y, lambda key, param: (key, param)),
+        (lambda x, y: x - y, lambda x, y: x, lambda key, param: (param, param - key)),
+        (lambda x, y: x + y, lambda x, y: x, lambda key, param: (param, key - param)),
+    )
+
+    def __init__(self, segments):
+        intervals = [collections.defaultdict(list) for _ in self.FAMILIES]
+        for x1, y1, x2, y2 in segments:
+            family = self.familyOf(x1, y1, x2, y2)
+            if family is None:
+                continue
+
+            key, param = self.FAMILIES[family][:2]
+            start, end = param(x1, y1), param(x2, y2)
+            intervals[family][key(x1, y1)].append((min(start, end), max(start, end)))
+
+        self.lines = [{key: self._coverage(lineIntervals) for key, lineIntervals in familyIntervals.items()}
+                      for familyIntervals in intervals]
+        self.keys = [sorted(lines) for lines in self.lines]
+
+    @staticmethod
+    def familyOf(x1, y1, x2, y2):
+        if y1 == y2 and x1 != x2:
+            return 0
+        if x1 == x2:
+            return 1
+        if x2 - x1 == y2 - y1:
+            return 2
+        if x2 - x1 == y1 - y2:
+            return 3
+        return None
+
+    @staticmethod
+    def _coverage(intervals):
+        """
+        :return: (starts, ends) of the merged stretches covered at least once and at least twice, sorted by start
+        """
+        events = sorted([(start, 1) for start, _ in intervals] + [(end + 1, -1) for _, end in intervals])
+        covered, multiple = [], []
+        depth = 0
+        for position, changes in itertools.groupby(events, key=lambda event: event[0]):
+            before = depth
+            depth += sum(change for _, change in changes)
+            for stretches, level in ((covered, 1), (multiple, 2)):
+                if before < level <= depth:
+                    stretches.append([position, None])
+                elif depth < level <= before:
+                    stretches[-1][1] = position - 1
+
+        return tuple(tuple(zip(*stretches)) or ((), ()) for stretches in (covered, multiple))
+
+    @staticmethod
+    def _contains(stretches, param):
+        starts, ends = stretches
+        i = bisect.bisect_right(starts, param) - 1
+        return i >= 0 and ends[i] >= param
+
+    def _crossings(self, family_a, family_b):
+        _, _, pointA = self.FAMILIES[family_a]
+        keyB, paramB, _ = self.FAMILIES[family_b]
+        keysB, linesB = self.keys[family_b], self.lines[family_b]
+
+        for keyA, ((starts, ends), _) in self.lines[family_a].items():
+            for start, end in zip(starts, ends):
+                first = keyB(*pointA(keyA, start))
+                slope = keyB(*pointA(keyA, start + 1)) - first
+                low, high = sorted((first, keyB(*pointA(keyA, end))))
+
+                for key in keysB[bisect.bisect_left(keysB, low): bisect.bisect_right(keysB, high)]:
+                    if (key - first) % slope:
+                        continue
+                    point = pointA(keyA, start + (key - first) // slope)
+                    if self._contains(linesB[key][0], paramB(*point)):
+                        yield point
+
+    def overlapCount(self):
+        total = sum(end - start + 1
+                    for lines in self.lines for _, (starts, ends) in lines.values() for start, end in zip(starts, ends))
+
+        crossings = set()
+        for familyA, familyB in itertools.combinations(range(len(self.FAMILIES)), 2):
+            crossings.update(self._crossings(familyA, familyB))
+
+        for point in crossings:
+            total += 1
+            for lines, (key, param, _) in zip(self.lines, self.FAMILIES):
+                line = lines.get(key(*point))
+                if line is not None and self._contains(line[1], param(*point)):
+                    total -= 1
+
+        return total
+
+
 class Day5:
     """
     --- Day 5: Hydrothermal Venture ---
@@ -685,3 +1976,25 @@ class Day5:
         print(self.locationMap)
 
         return sum(1 for line in self.locationMap.data for point in line if point > 1)
+
+    def part1_Array(self):
+        locationMap = ArrayLocationMap(1000)
+        locationMap.markSegments(SegmentTable.fromFile().data)
+
+        return locationMap.overlapCount()
+
+    def part1_Tiled(self, tile_size=256, workers=None):
+        locationMap = TiledLocationMap(tile_size, workers)
+        locationMap.markSegments(SegmentTable.fromFile().data)
+
+        return locationMap.overlapCount()
+
+    def part1_Sparse(self):
+        locationMap = SparseLocationMap()
+        for start, end in self.data:
+            locationMap.markLine(start, end)
+
+        return locationMap.overlapCount()
+
+    def part1_Analytic(self):
+        return SegmentOverlap((start.x, start.y, end.x, end.y) for start, end in self.data).overlapCount()
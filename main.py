@@ -1,8 +1,65 @@
+import concurrent.futures
 import math
+import time
 
 import numpy as np
 
 
+class Histogram:
+    """
+    Shared ingest path for the comma separated inputs of Day6 and Day7. The file is read in chunks cut at the last
+    separator, every chunk is parsed straight into an int64 array and counted with one np.bincount, so memory is
+    bounded by the chunk size and the histogram rather than by the file.
+    """
+    CHUNK_SIZE = 1 << 24
+
+    @staticmethod
+    def readIntegers(path, chunk_size=CHUNK_SIZE):
+        """
+        Yields the integers of a comma separated file as one int64 array per chunk.
+        """
+        remainder = ''
+        with open(path, "r") as f:
+            while chunk := f.read(chunk_size):
+                chunk = remainder + chunk
+                cut = chunk.rfind(',') + 1
+                remainder = chunk[cut:]
+                yield np.fromstring(chunk[:cut], dtype=np.int64, sep=',')
+
+        if remainder.strip():
+            yield np.fromstring(remainder, dtype=np.int64, sep=',')
+
+    @classmethod
+    def dense(cls, path, minlength=0, chunk_size=CHUNK_SIZE):
+        """
+        :return: counts where counts[v] is the number of times v occurs
+        """
+        counts = np.zeros(minlength, dtype=np.int64)
+        for values in cls.readIntegers(path, chunk_size):
+            chunkCounts = np.bincount(values, minlength=len(counts))
+            chunkCounts[:len(counts)] += counts
+            counts = chunkCounts
+
+        return counts
+
+    @classmethod
+    def sparse(cls, path, chunk_size=CHUNK_SIZE):
+        """
+        :return: (values, counts) of the distinct values in increasing order, for inputs too sparse or too wide for
+        dense
+        """
+        values = np.empty(0, dtype=np.int64)
+        counts = np.empty(0, dtype=np.int64)
+        for chunk in cls.readIntegers(path, chunk_size):
+            chunkValues, chunkCounts = np.unique(chunk, return_counts=True)
+            values, inverse = np.unique(np.concatenate((values, chunkValues)), return_inverse=True)
+            merged = np.zeros(len(values), dtype=np.int64)
+            np.add.at(merged, inverse, np.concatenate((counts, chunkCounts)))
+            counts = merged
+
+        return values, counts
+
+
 class Day6:
     """
     --- Day 6: Lantern-fish ---
@@ -82,7 +139,7 @@ class Day6:
     def __init__(self):
         with open("Data/Day6Data.txt", "r") as f:
             self.data = [*map(int, f.read().split(','))]
-            self.countAtAge = [self.data.count(i) for i in range(9)]
+            self.countAtAge = Histogram.dense("Data/Day6Data.txt", minlength=9).tolist()
             self.iterations = 256
 
     def part1(self):
@@ -97,6 +154,12 @@ class Day6:
             self.data += [8] * new_fish
         return len(self.data)
 
+    def part1_Bounded(self, days=None, memory_budget=None):
+        if memory_budget is None:
+            memory_budget = BoundedLanternfishSimulator.MEMORY_BUDGET
+        simulator = BoundedLanternfishSimulator(self.data, memory_budget)
+        return simulator.run(self.iterations if days is None else days), simulator.path
+
     def part2(self):
         print(self.countAtAge)
         for _ in range(self.iterations):
@@ -104,6 +167,225 @@ class Day6:
             self.countAtAge[6] += self.countAtAge[8]
 
         print(sum(self.countAtAge))
+        return sum(self.countAtAge)
+
+    def part2_RingBuffer(self, days=None):
+        return LanternfishSimulator(self.countAtAge).run(self.iterations if days is None else days)
+
+    def part2_Matrix(self, days=None, modulus=None):
+        return LanternfishMatrix(modulus).population(self.countAtAge, self.iterations if days is None else days)
+
+
+class BoundedLanternfishSimulator:
+    """
+    Per-fish simulation like Day6.part1 on a growable uint8 array, for checking trajectories at small day counts. A
+    day decrements every timer in place, lets the wrapped-around timers reset to 6 and appends one 8 per spawn, doubling
+    the capacity when needed. Before running, the peak memory of the run is projected from the timer counts; when it
+    would exceed memory_budget bytes the counting solver answers instead, and path tells which one ran.
+    """
+    MEMORY_BUDGET = 1 << 28
+    PER_FISH = 'per-fish'
+    COUNTING = 'counting'
+
+    def __init__(self, timers, memory_budget=MEMORY_BUDGET):
+        self.memoryBudget = memory_budget
+        self.buffer = np.array(timers, dtype=np.uint8)
+        self.size = len(self.buffer)
+        self.path = None
+
+    @property
+    def fish(self):
+        return self.buffer[:self.size]
+
+    def projectedBytes(self, days):
+        """
+        Replays the growth of the buffer on the timer counts and returns the largest number of bytes step holds at
+        once: the spawning mask, and while growing both the old and the new buffer. Stops early once the peak exceeds
+        the memory budget.
+        """
+        countAtAge = np.bincount(self.fish, minlength=9).tolist()
+        itemsize = self.buffer.itemsize
+        capacity, size = len(self.buffer), self.size
+        peak = capacity * itemsize
+        for _ in range(days):
+            spawning = countAtAge[0]
+            countAtAge = countAtAge[1:] + [0]
+            countAtAge[6] += spawning
+            countAtAge[8] += spawning
+
+            grown = max(2 * capacity, size + spawning) if size + spawning > capacity else 0
+            peak = max(peak, (capacity + grown) * itemsize + size * np.dtype(bool).itemsize)
+            capacity, size = grown or capacity, size + spawning
+            if peak > self.memoryBudget:
+                break
+
+        return peak
+
+    def step(self):
+        fish = self.fish
+        fish -= 1
+        spawning = fish == np.iinfo(np.uint8).max
+        fish[spawning] = 6
+        newborn = int(np.count_nonzero(spawning))
+
+        if self.size + newborn > len(self.buffer):
+            grown = np.empty(max(2 * len(self.buffer), self.size + newborn), dtype=np.uint8)
+            grown[:self.size] = fish
+            self.buffer = grown
+        self.buffer[self.size: self.size + newborn] = 8
+        self.size += newborn
+
+    def run(self, days):
+        if self.projectedBytes(days) > self.memoryBudget:
+            self.path = self.COUNTING
+            return LanternfishMatrix().population(np.bincount(self.fish, minlength=9), days)
+
+        self.path = self.PER_FISH
+        for _ in range(days):
+            self.step()
+
+        return self.size
+
+
+class LanternfishSimulator:
+    """
+    Day by day lantern-fish simulation on a fixed counter array indexed from a rotating head. The fish with timer 0
+    keep their slot, which becomes the newborn slot once the head moves past it, so a day only adds the spawning fish
+    to the reset slot: O(1) per day without allocating a list.
+    """
+
+    def __init__(self, count_at_age, reset_timer=6, newborn_timer=8):
+        if not 0 <= reset_timer <= newborn_timer:
+            raise ValueError("Timers must satisfy 0 <= reset_timer <= newborn_timer")
+        if len(count_at_age) > newborn_timer + 1:
+            raise ValueError(f"Timers above the newborn timer {newborn_timer} are not possible")
+
+        self.resetTimer = reset_timer
+        self.slots = newborn_timer + 1
+        self.countAtAge = list(count_at_age) + [0] * (self.slots - len(count_at_age))
+        self.head = 0
+        self.population = sum(self.countAtAge)
+        self.day = 0
+
+    def counts(self):
+        return self.countAtAge[self.head:] + self.countAtAge[:self.head]
+
+    def step(self):
+        spawning = self.countAtAge[self.head]
+        self.head = (self.head + 1) % self.slots
+        self.countAtAge[(self.head + self.resetTimer) % self.slots] += spawning
+        self.population += spawning
+        self.day += 1
+
+        return self.population
+
+    def populationSeries(self, days):
+        """
+        Yields the population at the end of each of the next days days.
+        """
+        for _ in range(days):
+            yield self.step()
+
+    def run(self, days):
+        for _ in range(days):
+            self.step()
+
+        return self.population
+
+
+class LanternfishMatrix:
+    """
+    One day of lantern-fish growth is a linear map on the nine timer counts, so the counts after n days are the
+    initial counts times the n-th power of its matrix. The powers M^(2^k) are squared once and cached, and each query
+    multiplies the count vector by the cached powers of the set bits of n, in O(81 log n) operations.
+
+    Results are exact Python integers, or reduced modulo modulus when one is given. Without a modulus the counts grow
+    by about 10^(0.037 n) digits, so day counts in the millions and above need a modulus.
+    """
+    TIMERS = 9
+
+    def __init__(self, modulus=None):
+        self.modulus = modulus
+        # day[i][j] is the number of fish with timer j tomorrow per fish with timer i today
+        day = [[0] * self.TIMERS for _ in range(self.TIMERS)]
+        for timer in range(1, self.TIMERS):
+            day[timer][timer - 1] = 1
+        day[0][6] = day[0][8] = 1
+        self.powers = [self._reduce(day)]
+
+    def _reduce(self, matrix):
+        if self.modulus is None:
+            return matrix
+        return [[value % self.modulus for value in row] for row in matrix]
+
+    def _power(self, bit):
+        while len(self.powers) <= bit:
+            last = self.powers[-1]
+            self.powers.append(self._reduce([[sum(a * b for a, b in zip(row, column)) for column in zip(*last)]
+                                             for row in last]))
+
+        return self.powers[bit]
+
+    def counts(self, count_at_age, days):
+        """
+        :return: the nine timer counts after days days, starting from count_at_age
+        """
+        days = int(days)
+        counts = [int(count) for count in count_at_age]
+        for bit in range(days.bit_length()):
+            if days >> bit & 1:
+                counts = [sum(c * m for c, m in zip(counts, column)) for column in zip(*self._power(bit))]
+                if self.modulus is not None:
+                    counts = [c % self.modulus for c in counts]
+
+        return counts
+
+    def population(self, count_at_age, days):
+        total = sum(self.counts(count_at_age, days))
+        return total if self.modulus is None else total % self.modulus
+
+
+class LanternfishBatch:
+    """
+    Population queries for many starting populations at once. The population after n days is linear in the timer
+    histogram, so with W[:, j] holding the descendants after days[j] days of one fish of each timer, the whole (m, k)
+    answer is the single product histograms @ W.
+    """
+
+    def __init__(self, modulus=None):
+        self.modulus = modulus
+        self.matrix = LanternfishMatrix(modulus)
+
+    @staticmethod
+    def histograms(populations):
+        """
+        Builds the (m, 9) timer histograms of m populations, each a sequence of fish timers, with one np.bincount.
+        """
+        populations = [np.asarray(population, dtype=np.int64) for population in populations]
+        owners = np.repeat(np.arange(len(populations)), [len(population) for population in populations])
+        timers = np.concatenate(populations) if populations else np.empty(0, dtype=np.int64)
+
+        return np.bincount(owners * LanternfishMatrix.TIMERS + timers,
+                           minlength=len(populations) * LanternfishMatrix.TIMERS).reshape(-1, LanternfishMatrix.TIMERS)
+
+    def descendants(self, days):
+        """
+        :return: (9, k) array of the population after each day count grown from one fish of each timer
+        """
+        units = np.eye(LanternfishMatrix.TIMERS, dtype=np.int64).tolist()
+        return np.array([[self.matrix.population(unit, int(n)) for n in days] for unit in units], dtype=object)
+
+    def populations(self, histograms, days):
+        histograms = np.asarray(histograms, dtype=np.int64).reshape(-1, LanternfishMatrix.TIMERS)
+        descendants = self.descendants(days)
+
+        largest = int(descendants.max(initial=0)) * int(histograms.sum(axis=1).max(initial=0))
+        if largest < np.iinfo(np.int64).max:
+            result = histograms @ descendants.astype(np.int64)
+        else:
+            result = histograms.astype(object) @ descendants
+
+        return result if self.modulus is None else result % self.modulus
 
 
 class Day7:
@@ -178,7 +460,7 @@ class Day7:
     def __init__(self):
         with open("Data/Day7Data.txt", "r") as f:
             self.data = [*map(int, f.read().split(','))]
-            self.crabsAtLocation = [self.data.count(i) for i in range(max(self.data) + 1)]
+            self.crabsAtLocation = Histogram.dense("Data/Day7Data.txt").tolist()
 
     def part1(self):
         optimumLocation = np.median(self.data)
@@ -201,6 +483,189 @@ class Day7:
 
         # print(self.crabsAtLocation, self.crabsAtLocation.index(max(self.crabsAtLocation)))
 
+    def part1_Exact(self):
+        return CrabAlignment(self.crabsAtLocation).linear()
+
+    def part2_Exact(self):
+        return CrabAlignment(self.crabsAtLocation).triangular()
+
+    def optimum(self, model, weights=None):
+        optimizer = CrabOptimizer(self.crabsAtLocation, weights)
+        return optimizer.search(model) if model.convex else optimizer.scan(model)
+
+
+class CrabAlignment:
+    """
+    Exact fuel cost of aligning at every position 0..R in one vectorized pass over the crab histogram. With C(x) and
+    S(x) the prefix sums of counts and count * position, the linear cost is
+    x * C(x) - S(x) + (S - S(x)) - x * (N - C(x)). The triangular cost d(d + 1) / 2 adds the squared distances sum
+    Q - 2xS + x^2 N to it and halves the result.
+    Arithmetic is in int64 when n * R^2 fits and in Python integers otherwise.
+    """
+
+    def __init__(self, counts):
+        counts = np.asarray(counts, dtype=np.int64)
+        crabs = int(counts.sum())
+        dtype = np.int64 if crabs * len(counts) ** 2 < 2 ** 62 else object
+
+        self.counts = counts.astype(dtype)
+        self.positions = np.arange(len(counts), dtype=np.int64).astype(dtype)
+        self.crabs = self.counts.sum()
+        self.countsBelow = np.cumsum(self.counts)
+        self.moments = np.cumsum(self.counts * self.positions)
+
+    def linearCosts(self):
+        x, total = self.positions, self.moments[-1]
+        return x * self.countsBelow - self.moments + (total - self.moments) - x * (self.crabs - self.countsBelow)
+
+    def triangularCosts(self):
+        x, total = self.positions, self.moments[-1]
+        squares = (self.counts * self.positions * self.positions).sum()
+        return (squares - 2 * x * total + x * x * self.crabs + self.linearCosts()) // 2
+
+    @staticmethod
+    def _optimum(costs):
+        position = int(np.argmin(costs))
+        return position, int(costs[position])
+
+    def linear(self):
+        """
+        :return: (position, fuel) of the cheapest alignment, the lowest position on ties
+        """
+        return self._optimum(self.linearCosts())
+
+    def triangular(self):
+        return self._optimum(self.triangularCosts())
+
+
+class CrabCostModel:
+    """
+    Fuel model for crab alignment: fuel maps an ndarray of distances to the fuel each crab spends. Only models flagged
+    convex may be optimized by CrabOptimizer.search, every other model needs the dense scan.
+    """
+
+    def __init__(self, fuel, convex=True):
+        self.fuel = fuel
+        self.convex = convex
+
+    @classmethod
+    def capped(cls, cap):
+        return cls(lambda distance: np.minimum(distance, cap), convex=False)
+
+
+CrabCostModel.LINEAR = CrabCostModel(lambda distance: distance)
+CrabCostModel.TRIANGULAR = CrabCostModel(lambda distance: distance * (distance + 1) // 2)
+CrabCostModel.QUADRATIC = CrabCostModel(lambda distance: distance * distance)
+
+
+class CrabOptimizer:
+    """
+    Finds the cheapest alignment position for any CrabCostModel over the nonzero bins of a crab histogram, optionally
+    weighting the crabs of every position. The aggregate cost of a sum of convex per-crab costs is convex, so search
+    finds the lowest optimal position with a binary search on the sign of cost(x + 1) - cost(x); scan evaluates every
+    position as the fallback for other models.
+    """
+
+    def __init__(self, counts, weights=None):
+        counts = np.asarray(counts)
+        self.size = len(counts)
+        self.positions = np.flatnonzero(counts)
+        self.weights = counts[self.positions] if weights is None else (counts * np.asarray(weights))[self.positions]
+
+    def _arrays(self, model):
+        """
+        Positions and weights to evaluate model with: the int64 arrays when the worst-case total cost fits, and
+        Python integer object arrays otherwise. Float weights never wrap and are used as they are. A convex fuel is
+        largest at one of the extreme distances; any other fuel is evaluated at every distance for the bound.
+        """
+        if self.weights.dtype.kind not in 'iu':
+            return self.positions, self.weights
+
+        if model.convex:
+            distances = np.array([0, max(self.size - 1, 0)], dtype=object)
+        else:
+            distances = np.arange(max(self.size, 1), dtype=object)
+        largestFuel = max(abs(int(fuel)) for fuel in model.fuel(distances))
+        bound = int(np.abs(self.weights).max(initial=0)) * len(self.weights) * largestFuel
+        if bound < 2 ** 62:
+            return self.positions, self.weights
+
+        return self.positions.astype(object), self.weights.astype(object)
+
+    @staticmethod
+    def _scalar(value):
+        return value.item() if isinstance(value, np.generic) else value
+
+    def cost(self, model, position, arrays=None):
+        positions, weights = arrays or self._arrays(model)
+        return self._scalar((weights * model.fuel(np.abs(positions - position))).sum())
+
+    def search(self, model):
+        """
+        :return: (position, cost) found with O(log R) probes
+        """
+        arrays = self._arrays(model)
+        low, high = 0, self.size - 1
+        while low < high:
+            middle = (low + high) // 2
+            if self.cost(model, middle + 1, arrays) - self.cost(model, middle, arrays) >= 0:
+                high = middle
+            else:
+                low = middle + 1
+
+        return low, self.cost(model, low, arrays)
+
+    def scan(self, model, chunk_size=1 << 22):
+        """
+        :return: (position, cost) of the lowest optimal position, evaluating all positions in chunks of at most
+        chunk_size distances
+        """
+        positions, weights = self._arrays(model)
+        rows = max(1, chunk_size // max(len(positions), 1))
+        best = None
+        for start in range(0, self.size, rows):
+            candidates = np.arange(start, min(start + rows, self.size)).astype(positions.dtype)
+            costs = (weights * model.fuel(np.abs(positions - candidates[:, None]))).sum(axis=1)
+            i = int(np.argmin(costs))
+            if best is None or costs[i] < best[1]:
+                best = int(candidates[i]), self._scalar(costs[i])
+
+        return best
+
+
+class CrabFleetOptimizer:
+    """
+    Solves both alignment parts for many crab fleets in a process pool. A fleet is either the path of a comma
+    separated input file or an array of crab positions; workers build its histogram and solve it with CrabAlignment,
+    taking fleets in chunks of chunk_size to keep scheduling overhead low. After optimize, elapsed and fleetsPerSecond
+    hold the measured throughput.
+    """
+
+    def __init__(self, workers=None, chunk_size=64):
+        self.workers = workers
+        self.chunkSize = chunk_size
+        self.elapsed = 0.0
+        self.fleetsPerSecond = 0.0
+
+    def optimize(self, fleets):
+        """
+        :return: (m, 4) array of part 1 position, part 1 fuel, part 2 position and part 2 fuel for every fleet
+        """
+        fleets = list(fleets)
+        start = time.perf_counter()
+        with concurrent.futures.ProcessPoolExecutor(self.workers) as pool:
+            results = list(pool.map(_optimizeFleet, fleets, chunksize=self.chunkSize))
+        self.elapsed = time.perf_counter() - start
+        self.fleetsPerSecond = len(fleets) / self.elapsed if self.elapsed else 0.0
+
+        return np.array(results).reshape(-1, 4)
+
+
+def _optimizeFleet(fleet):
+    counts = Histogram.dense(fleet) if isinstance(fleet, str) else np.bincount(np.asarray(fleet, dtype=np.int64))
+    alignment = CrabAlignment(counts)
+    return alignment.linear() + alignment.triangular()
+
 
 # Press the green button in the gutter to run the script.
 if __name__ == '__main__':